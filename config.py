@@ -1,13 +1,11 @@
 import os
 import sys
 from pathlib import Path
-from dotenv import load_dotenv
 
-# Load .env from the project root (same dir as this file)
 _project_root = Path(__file__).resolve().parent
-load_dotenv(_project_root / ".env")
 
-_loaded = False
+# Set once _ensure_loaded() has run; callers check it to skip the call.
+LOADED = False
 
 
 def _require(var_name):
@@ -20,11 +18,16 @@ def _require(var_name):
 
 def _ensure_loaded():
     """Load required config on first access. Allows --help to work without .env."""
-    global _loaded, FITBIT_CLIENT_ID, FITBIT_CLIENT_SECRET, GOOGLE_SHEET_ID
+    global LOADED, FITBIT_CLIENT_ID, FITBIT_CLIENT_SECRET, GOOGLE_SHEET_ID
     global GOOGLE_SERVICE_ACCOUNT_FILE, FITBIT_TOKEN_FILE
-    global API_KEY, SERVER_PORT
-    if _loaded:
+    global API_KEY, API_KEY_BYTES, SERVER_PORT
+    if LOADED:
         return
+    # Imported here so CLI paths that never read config (e.g. --help) skip dotenv.
+    from dotenv import load_dotenv
+
+    # Load .env from the project root (same dir as this file)
+    load_dotenv(_project_root / ".env")
     FITBIT_CLIENT_ID = _require("FITBIT_CLIENT_ID")
     FITBIT_CLIENT_SECRET = _require("FITBIT_CLIENT_SECRET")
     GOOGLE_SHEET_ID = _require("GOOGLE_SHEET_ID")
@@ -37,8 +40,9 @@ def _ensure_loaded():
         str(_project_root / "tokens.json"),
     )
     API_KEY = _require("API_KEY")
+    API_KEY_BYTES = API_KEY.encode("utf-8")
     SERVER_PORT = int(os.getenv("SERVER_PORT", "8585"))
-    _loaded = True
+    LOADED = True
 
 
 # Defaults so imports don't fail before _ensure_loaded()
@@ -48,6 +52,7 @@ GOOGLE_SHEET_ID = ""
 GOOGLE_SERVICE_ACCOUNT_FILE = str(_project_root / "service_account.json")
 FITBIT_TOKEN_FILE = str(_project_root / "tokens.json")
 API_KEY = ""
+API_KEY_BYTES = b""
 SERVER_PORT = 8585
 
 FITBIT_AUTH_URI = "https://www.fitbit.com/oauth2/authorize"
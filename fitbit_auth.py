@@ -5,16 +5,34 @@ import hashlib
 import json
 import os
 import secrets
+import tempfile
 import threading
+import time
 import webbrowser
+from concurrent.futures import Future
 from http.server import HTTPServer, BaseHTTPRequestHandler
+from pathlib import Path
 from urllib.parse import urlparse, parse_qs
 
 import requests
+from requests.adapters import HTTPAdapter
 from requests_oauthlib import OAuth2Session
+from urllib3.util.retry import Retry
 
 import config
 
+try:
+    import orjson  # optional, faster token (de)serialization
+except ImportError:
+    orjson = None
+
+# Token states, by time remaining until expires_at.
+_FRESH, _STALE, _EXPIRED = "fresh", "stale", "expired"
+_STALE_WINDOW = 180  # seconds before expiry to start a background refresh
+_EXPIRY_MARGIN = 30  # seconds before expiry to treat a token as expired
+_VALID_MARGIN = 300  # seconds of validity left for which no refresh checks run
+_PREFETCH_WINDOW = 600  # seconds before expiry that prefetch_refresh() acts
+
 
 # ---------------------------------------------------------------------------
 # PKCE helpers
@@ -22,7 +40,8 @@ import config
 
 def _generate_pkce():
     """Generate code_verifier and code_challenge for PKCE."""
-    verifier = secrets.token_urlsafe(64)[:128]
+    # 96 random bytes encode to exactly 128 base64url chars, the RFC 7636 maximum.
+    verifier = base64.urlsafe_b64encode(secrets.token_bytes(96)).rstrip(b"=").decode("ascii")
     digest = hashlib.sha256(verifier.encode("ascii")).digest()
     challenge = base64.urlsafe_b64encode(digest).rstrip(b"=").decode("ascii")
     return verifier, challenge
@@ -76,16 +95,49 @@ def _wait_for_callback():
 # Token persistence
 # ---------------------------------------------------------------------------
 
+# Parsed token file, keyed on its mtime so it is only re-read when it changes.
+_token_cache = (None, None)
+
+
 def _save_token(token):
-    with open(config.FITBIT_TOKEN_FILE, "w") as f:
-        json.dump(token, f, indent=2)
+    # Persist an absolute expiry so a restarted process knows the token is
+    # still valid without having to refresh it.
+    if "expires_at" not in token and "expires_in" in token:
+        token["expires_at"] = time.time() + int(token["expires_in"])
+    if orjson is not None:
+        data = orjson.dumps(token, option=orjson.OPT_INDENT_2)
+    else:
+        data = json.dumps(token, indent=2).encode()
+    # Write to a private (0600), uniquely named temp file and swap it in, so an
+    # interrupted or concurrent write can't leave a truncated tokens.json.
+    path = Path(config.FITBIT_TOKEN_FILE)
+    fd, tmp = tempfile.mkstemp(dir=path.parent, prefix=path.name + ".")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except BaseException:
+        try:
+            os.unlink(tmp)
+        except FileNotFoundError:
+            pass
+        raise
 
 
 def _load_token():
-    if not os.path.exists(config.FITBIT_TOKEN_FILE):
+    global _token_cache
+    try:
+        mtime = os.path.getmtime(config.FITBIT_TOKEN_FILE)
+    except FileNotFoundError:
         return None
-    with open(config.FITBIT_TOKEN_FILE) as f:
-        return json.load(f)
+    cached_mtime, token = _token_cache
+    if cached_mtime != mtime:
+        raw = Path(config.FITBIT_TOKEN_FILE).read_bytes()
+        token = orjson.loads(raw) if orjson is not None else json.loads(raw)
+        _token_cache = (mtime, token)
+    return token
 
 
 # ---------------------------------------------------------------------------
@@ -94,7 +146,8 @@ def _load_token():
 
 def authorize():
     """Run the full OAuth2 browser flow. Returns a token dict."""
-    config._ensure_loaded()
+    if not config.LOADED:
+        config._ensure_loaded()
     verifier, challenge = _generate_pkce()
 
     session = OAuth2Session(
@@ -129,26 +182,188 @@ def authorize():
     return token
 
 
-def get_session():
-    """Return an OAuth2Session with a valid access token (auto-refreshes if needed)."""
-    config._ensure_loaded()
+def _new_session():
+    """Build an OAuth2Session from the saved token with a pooled HTTPS adapter."""
+    if not config.LOADED:
+        config._ensure_loaded()
     token = _load_token()
     if token is None:
         print("No tokens found. Run 'python main.py auth' first.")
         raise SystemExit(1)
 
-    def _token_updater(new_token):
-        _save_token(new_token)
-
-    session = OAuth2Session(
-        config.FITBIT_CLIENT_ID,
-        token=token,
-        auto_refresh_url=config.FITBIT_TOKEN_URI,
-        auto_refresh_kwargs={
-            "client_id": config.FITBIT_CLIENT_ID,
-            "client_secret": config.FITBIT_CLIENT_SECRET,
-        },
-        token_updater=_token_updater,
+    # No auto_refresh_url: every refresh goes through _TokenManager so it is
+    # single-flight, instead of each fetch worker refreshing on its own.
+    session = OAuth2Session(config.FITBIT_CLIENT_ID, token=token)
+
+    # Keep connections to api.fitbit.com alive across the fetch_all fan-out
+    # and retry transient server errors on GETs. Rate limiting (429) fails
+    # fast: Fitbit's Retry-After is the time until the hourly quota resets,
+    # far longer than any request should block.
+    retry = Retry(
+        total=3,
+        backoff_factor=0.3,
+        status_forcelist=[500, 502, 503, 504],
+        allowed_methods=["GET"],
+        respect_retry_after_header=False,
     )
-
+    adapter = HTTPAdapter(pool_connections=1, pool_maxsize=16, max_retries=retry)
+    session.mount("https://", adapter)
     return session
+
+
+class _TokenManager:
+    """Caches the OAuth2Session and refreshes its token ahead of expiry.
+
+    In a long-running process (see enable_background_refresh) a stale token
+    (close to expiry) is refreshed in a background thread while callers keep
+    using the still-valid access token, and only an expired token blocks the
+    caller. Elsewhere, e.g. the one-shot CLI, stale tokens are refreshed
+    synchronously so the process can't exit mid-rotation. At most one refresh
+    runs at a time: other callers wait on the in-flight refresh instead of
+    starting their own.
+    """
+
+    def __init__(self):
+        self.background = False
+        self._session = None
+        self._file_token = None
+        self._lock = threading.Lock()
+        self._refresh_lock = threading.Lock()
+        self._refresh_future = None
+
+    def _state(self):
+        expires_at = self._session.token.get("expires_at")
+        if not expires_at:
+            return _FRESH
+        remaining = expires_at - time.time()
+        # Leave headroom so the token can't expire during the fetch_all fan-out.
+        if remaining <= _EXPIRY_MARGIN:
+            return _EXPIRED
+        if remaining < _STALE_WINDOW:
+            return _STALE
+        return _FRESH
+
+    def _expires_within(self, window):
+        expires_at = self._session.token.get("expires_at")
+        return bool(expires_at) and expires_at - time.time() < window
+
+    def _sync_from_file(self):
+        """Adopt the token file if another process (e.g. the CLI) rewrote it."""
+        # Held so a refresh can't start between the check and the swap.
+        with self._refresh_lock:
+            if self._refresh_future is not None:
+                return
+            token = _load_token()  # only re-parsed when the file's mtime changed
+            if token is not None and token is not self._file_token:
+                self._file_token = token
+                self._session.token = token
+
+    def get(self):
+        if self._session is None:
+            with self._lock:
+                if self._session is None:
+                    self._session = _new_session()
+                    self._file_token = _load_token()
+        else:
+            self._sync_from_file()
+
+        session = self._session
+        if session.token.get("expires_at", 0) - time.time() > _VALID_MARGIN:
+            return session
+
+        state = self._state()
+        if state == _EXPIRED:
+            self._refresh_now()
+        elif state == _STALE:
+            self.refresh_in_background()
+        return self._session
+
+    def _refresh_now(self, window=_STALE_WINDOW):
+        """Refresh (or wait on an in-flight refresh) before returning."""
+        future, owner = self._begin_refresh(window)
+        if owner:
+            self._run_refresh(future)
+        if future is not None:
+            future.result()
+
+    def refresh_in_background(self, window=_STALE_WINDOW):
+        """Start a background refresh if the token expires within window seconds.
+
+        Falls back to a synchronous refresh unless background refresh is enabled.
+        """
+        if self._session is None:
+            return
+        if not self.background:
+            self._refresh_now(window)
+            return
+        future, owner = self._begin_refresh(window)
+        if owner:
+            threading.Thread(
+                target=self._refresh_async, args=(future,), daemon=True
+            ).start()
+
+    def _begin_refresh(self, window=_STALE_WINDOW):
+        """Claim the refresh slot.
+
+        Returns (future, owner): owner is True if the caller must run the
+        refresh; otherwise future is the in-flight refresh to wait on, or None
+        if the token no longer expires within window (e.g. another thread
+        already refreshed it).
+        """
+        with self._refresh_lock:
+            if self._refresh_future is not None:
+                return self._refresh_future, False
+            if not self._expires_within(window):
+                return None, False
+            self._refresh_future = Future()
+            return self._refresh_future, True
+
+    def _run_refresh(self, future):
+        try:
+            self._refresh()
+        except Exception as e:
+            future.set_exception(e)
+        else:
+            future.set_result(None)
+        finally:
+            with self._refresh_lock:
+                self._refresh_future = None
+
+    def _refresh(self):
+        token = self._session.refresh_token(
+            config.FITBIT_TOKEN_URI,
+            client_id=config.FITBIT_CLIENT_ID,
+            client_secret=config.FITBIT_CLIENT_SECRET,
+        )
+        _save_token(token)
+
+    def _refresh_async(self, future):
+        self._run_refresh(future)
+        if future.exception() is not None:
+            print(f"Warning: background token refresh failed: {future.exception()}")
+
+
+_token_manager = _TokenManager()
+
+
+def get_session():
+    """Return an OAuth2Session with a valid access token (auto-refreshes if needed)."""
+    return _token_manager.get()
+
+
+def enable_background_refresh():
+    """Allow token refreshes on daemon threads.
+
+    Only for long-running processes: a refresh cut off by interpreter exit
+    can leave tokens.json with an already-rotated refresh token.
+    """
+    _token_manager.background = True
+
+
+def prefetch_refresh(window=_PREFETCH_WINDOW):
+    """Refresh the cached token in the background if it expires within window seconds.
+
+    Called by the server after a fetch so the next request (e.g. the following
+    cron run) doesn't have to block on a refresh.
+    """
+    _token_manager.refresh_in_background(window)
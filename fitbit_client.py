@@ -1,11 +1,18 @@
 """Fitbit API client — fetches all health metrics for a given date."""
 
-from datetime import date
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import date, datetime, timedelta
 
 import fitbit_auth
 
 BASE = "https://api.fitbit.com"
 
+# Shared worker pool for the per-metric fan-out, sized to the session's HTTP
+# connection pool (see fitbit_auth._new_session) so every worker can hold a
+# kept-alive connection. Reused across fetches instead of spun up per call.
+_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="fitbit-fetch")
+
 
 def _get(session, path):
     """Make a GET request and return the JSON response."""
@@ -36,16 +43,26 @@ def _total_distance(summary):
     distances = summary.get("distances", [])
     for d in distances:
         if d.get("activity") == "total":
-            return round(d.get("distance", 0), 2)
+            return d.get("distance", 0)
     return 0
 
 
+# Values returned when the API has no data for a metric (copied per call).
+_AZM_EMPTY = {"azm_fat_burn": 0, "azm_cardio": 0, "azm_peak": 0, "azm_total": 0}
+_SLEEP_EMPTY = {
+    "sleep_start": "", "sleep_end": "",
+    "sleep_duration_hrs": 0, "sleep_efficiency": 0,
+    "sleep_deep_min": 0, "sleep_light_min": 0,
+    "sleep_rem_min": 0, "sleep_wake_min": 0,
+}
+
+
 def get_azm(session, d: date):
     """Active Zone Minutes for the day."""
     data = _get(session, f"/1/user/-/activities/active-zone-minutes/date/{d}/1d.json")
     minutes = data.get("activities-active-zone-minutes", [])
     if not minutes:
-        return {"azm_fat_burn": 0, "azm_cardio": 0, "azm_peak": 0, "azm_total": 0}
+        return _AZM_EMPTY.copy()
     val = minutes[0].get("value", {})
     return {
         "azm_fat_burn": val.get("fatBurnActiveZoneMinutes", 0),
@@ -68,12 +85,7 @@ def get_sleep(session, d: date):
     if not main and sleeps:
         main = sleeps[0]
     if not main:
-        return {
-            "sleep_start": "", "sleep_end": "",
-            "sleep_duration_hrs": 0, "sleep_efficiency": 0,
-            "sleep_deep_min": 0, "sleep_light_min": 0,
-            "sleep_rem_min": 0, "sleep_wake_min": 0,
-        }
+        return _SLEEP_EMPTY.copy()
 
     summary = main.get("levels", {}).get("summary", {})
     duration_ms = main.get("duration", 0)
@@ -81,7 +93,7 @@ def get_sleep(session, d: date):
     return {
         "sleep_start": main.get("startTime", ""),
         "sleep_end": main.get("endTime", ""),
-        "sleep_duration_hrs": round(duration_ms / 3_600_000, 2),
+        "sleep_duration_hrs": duration_ms / 3_600_000,
         "sleep_efficiency": main.get("efficiency", 0),
         "sleep_deep_min": summary.get("deep", {}).get("minutes", 0),
         "sleep_light_min": summary.get("light", {}).get("minutes", 0),
@@ -107,7 +119,7 @@ def get_hrv(session, d: date):
     if not entries:
         return {"hrv_rmssd": ""}
     val = entries[0].get("value", {})
-    return {"hrv_rmssd": round(val.get("dailyRmssd", 0), 2) if val.get("dailyRmssd") else ""}
+    return {"hrv_rmssd": val.get("dailyRmssd") or ""}
 
 
 def get_spo2(session, d: date):
@@ -131,7 +143,7 @@ def get_breathing_rate(session, d: date):
     if not entries:
         return {"breathing_rate": ""}
     val = entries[0].get("value", {})
-    return {"breathing_rate": round(val.get("breathingRate", 0), 1) if val.get("breathingRate") else ""}
+    return {"breathing_rate": val.get("breathingRate") or ""}
 
 
 def get_skin_temp(session, d: date):
@@ -170,35 +182,38 @@ def get_exercises(session, d: date):
     if not activities:
         return {"exercises": "None"}
 
-    parts = []
-    for a in activities:
+    target = d.isoformat()
+    parts = (
+        f"{a.get('activityName', 'Unknown')} "
+        f"({round(a.get('activeDuration', 0) / 60000, 1)}min, {a.get('calories', 0)}cal)"
+        for a in activities
         # Only include activities from the target date
-        log_date = a.get("startDate", a.get("originalStartTime", ""))[:10]
-        if log_date != str(d):
-            continue
-        name = a.get("activityName", "Unknown")
-        duration_min = round(a.get("activeDuration", 0) / 60000, 1)
-        cals = a.get("calories", 0)
-        parts.append(f"{name} ({duration_min}min, {cals}cal)")
-
-    return {"exercises": "; ".join(parts) if parts else "None"}
+        if (a.get("startDate") or a.get("originalStartTime", ""))[:10] == target
+    )
+    return {"exercises": "; ".join(parts) or "None"}
 
 
 # ---------------------------------------------------------------------------
 # Aggregate fetcher
 # ---------------------------------------------------------------------------
 
-def fetch_all(d: date = None):
-    """Fetch all metrics for the given date (defaults to today).
+# Results of fetch_all by ISO date: {date: (fetched_at, row)}. An entry is
+# final once it was fetched after the day ended plus _SYNC_GRACE (for late
+# device syncs); until then it is only reused for _CACHE_TTL.
+_fetch_cache: dict[str, tuple[float, dict]] = {}
+_CACHE_TTL = 600  # seconds
+_SYNC_GRACE = 6 * 3600  # seconds after midnight before a day's data is final
 
-    Returns a flat dict ready for sheet writing.
-    """
-    if d is None:
-        d = date.today()
 
+def _fetch(d: date):
+    """Fetch all metrics for d from the API.
+
+    Returns (row, complete) where complete is False if any fetcher failed.
+    """
     session = fitbit_auth.get_session()
 
     row = {}
+    complete = True
     fetchers = [
         get_activity_summary,
         get_azm,
@@ -212,10 +227,47 @@ def fetch_all(d: date = None):
         get_exercises,
     ]
 
-    for fn in fetchers:
+    # get_session() has already refreshed an expired token (single-flight),
+    # so every fetcher can go out at once without racing a refresh.
+    futs = {_executor.submit(fn, session, d): fn for fn in fetchers}
+    for fut in as_completed(futs):
         try:
-            row.update(fn(session, d))
+            row.update(fut.result())
         except Exception as e:
-            print(f"Warning: {fn.__name__} failed: {e}")
+            complete = False
+            print(f"Warning: {futs[fut].__name__} failed: {e}")
+
+    return row, complete
 
+
+def _fetch_and_cache(d: date):
+    """Fetch d and cache the row if every metric was fetched successfully."""
+    fetched_at = time.time()
+    row, complete = _fetch(d)
+    if complete:
+        _fetch_cache[d.isoformat()] = (fetched_at, row)
     return row
+
+
+def _is_fresh(d: date, fetched_at: float):
+    """Whether a row for d fetched at fetched_at can be reused now."""
+    day_end = datetime.combine(d + timedelta(days=1), datetime.min.time()).timestamp()
+    if fetched_at >= day_end + _SYNC_GRACE:
+        return True
+    return time.time() - fetched_at < _CACHE_TTL
+
+
+def fetch_all(d: date = None):
+    """Fetch all metrics for the given date (defaults to today).
+
+    Returns a flat dict ready for sheet writing. Results are cached per date:
+    a finished day is served from the cache, while a row for a day that may
+    still change is re-fetched once it is older than _CACHE_TTL.
+    """
+    if d is None:
+        d = date.today()
+
+    cached = _fetch_cache.get(d.isoformat())
+    if cached is not None and _is_fresh(d, cached[0]):
+        return dict(cached[1])
+    return dict(_fetch_and_cache(d))
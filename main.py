@@ -5,18 +5,22 @@ import argparse
 import sys
 from datetime import date
 
-import fitbit_auth
-import fitbit_client
-import sheets_writer
+# Fitbit/Sheets modules pull in requests, requests-oauthlib and gspread, so
+# they are imported inside the commands that need them to keep --help fast.
 
 
 def cmd_auth(args):
     """Run the Fitbit OAuth2 authorization flow."""
+    import fitbit_auth
+
     fitbit_auth.authorize()
 
 
 def cmd_fitbit(args):
     """Pull Fitbit metrics and append to the sheet."""
+    import fitbit_client
+    import sheets_writer
+
     target = args.date if args.date else date.today()
     print(f"Fetching Fitbit data for {target}...")
     metrics = fitbit_client.fetch_all(target)
@@ -43,6 +47,8 @@ def cmd_bp(args):
         }
         readings.append(reading)
 
+    import sheets_writer
+
     sheets_writer.append_bp(readings)
 
 
@@ -78,6 +84,8 @@ def cmd_diet(args):
 
         items.append({"food_item": food, "weight_grams": weight, "notes": ""})
 
+    import sheets_writer
+
     sheets_writer.append_diet(meal, items)
 
 
@@ -4,13 +4,18 @@
 import hmac
 import traceback
 from datetime import date
-from http.server import HTTPServer, BaseHTTPRequestHandler
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
 from urllib.parse import urlparse, parse_qs
 
 import config
+import fitbit_auth
 import fitbit_client
 import sheets_writer
 
+# Fixed response bodies, encoded once.
+_BODY_404 = b"Not found. Use /fetch?key=YOUR_API_KEY"
+_BODY_403 = b"Forbidden: invalid or missing API key."
+
 
 class FetchHandler(BaseHTTPRequestHandler):
 
@@ -18,14 +23,15 @@ class FetchHandler(BaseHTTPRequestHandler):
         parsed = urlparse(self.path)
 
         if parsed.path != "/fetch":
-            self._respond(404, "Not found. Use /fetch?key=YOUR_API_KEY")
+            self._respond(404, _BODY_404)
             return
 
         params = parse_qs(parsed.query)
         key = params.get("key", [None])[0]
 
-        if not key or not hmac.compare_digest(key, config.API_KEY):
-            self._respond(403, "Forbidden: invalid or missing API key.")
+        # Compare as bytes: compare_digest rejects non-ASCII str arguments.
+        if not key or not hmac.compare_digest(key.encode("utf-8"), config.API_KEY_BYTES):
+            self._respond(403, _BODY_403)
             return
 
         # Determine target date
@@ -39,19 +45,24 @@ class FetchHandler(BaseHTTPRequestHandler):
         # Run the fetch + write pipeline
         try:
             metrics = fitbit_client.fetch_all(target)
-            sheets_writer.append_fitbit(metrics)
+            metrics = sheets_writer.append_fitbit(metrics)
         except Exception:
             self._respond(500, f"Error:\n{traceback.format_exc()}")
             return
 
+        fitbit_auth.prefetch_refresh()
+
         summary = "\n".join(f"  {k}: {v}" for k, v in metrics.items())
         self._respond(200, f"OK — Fitbit data for {target} written to sheet.\n\n{summary}")
 
     def _respond(self, code, body):
+        if isinstance(body, str):
+            body = body.encode()
         self.send_response(code)
         self.send_header("Content-Type", "text/plain; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(body.encode())
+        self.wfile.write(body)
 
     def log_message(self, fmt, *args):
         # Default format but prefixed for clarity
@@ -60,8 +71,10 @@ class FetchHandler(BaseHTTPRequestHandler):
 
 def main():
     config._ensure_loaded()
+    sheets_writer._get_sheet()  # pre-warm the Sheets client before serving
+    fitbit_auth.enable_background_refresh()
     addr = ("0.0.0.0", config.SERVER_PORT)
-    server = HTTPServer(addr, FetchHandler)
+    server = ThreadingHTTPServer(addr, FetchHandler)
     print(f"Listening on {addr[0]}:{addr[1]}  —  GET /fetch?key=...")
     try:
         server.serve_forever()
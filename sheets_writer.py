@@ -1,6 +1,7 @@
 """Google Sheets writer — appends rows to the Health Dashboard sheet."""
 
 from datetime import datetime
+from operator import itemgetter
 
 import gspread
 
@@ -16,25 +17,70 @@ FITBIT_COLUMNS = [
     "breathing_rate", "skin_temp_variation", "vo2_max", "exercises",
 ]
 
+# Decimal places for float metrics; fetchers return raw values and rounding
+# is applied here when the row is built.
+FLOAT_COLUMNS = {
+    "distance_km": 2,
+    "sleep_duration_hrs": 2,
+    "hrv_rmssd": 2,
+    "breathing_rate": 1,
+}
+
+# Fills in missing metrics, then pulls the columns out in sheet order.
+_DEFAULTS = dict.fromkeys(FITBIT_COLUMNS, "")
+_GETTER = itemgetter(*FITBIT_COLUMNS)
+
+
+# Cached client, spreadsheet and worksheet handles (opened on first use).
+_GC = None
+_SHEET = None
+_WS = {}
+
 
 def _get_sheet():
-    """Authenticate and return the Google Sheet."""
-    config._ensure_loaded()
-    gc = gspread.service_account(filename=config.GOOGLE_SERVICE_ACCOUNT_FILE)
-    return gc.open_by_key(config.GOOGLE_SHEET_ID)
+    """Authenticate and return the Google Sheet (cached after the first call)."""
+    global _GC, _SHEET
+    if _SHEET is None:
+        if not config.LOADED:
+            config._ensure_loaded()
+        _GC = gspread.service_account(filename=config.GOOGLE_SERVICE_ACCOUNT_FILE)
+        _SHEET = _GC.open_by_key(config.GOOGLE_SHEET_ID)
+    return _SHEET
+
+
+def _get_ws(name):
+    """Return the named worksheet, opening it only once."""
+    ws = _WS.get(name)
+    if ws is None:
+        ws = _WS[name] = _get_sheet().worksheet(name)
+    return ws
 
 
 def _timestamp():
     return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
 
 
+def round_metrics(metrics: dict):
+    """Return a copy of metrics with FLOAT_COLUMNS rounded for display."""
+    rounded = dict(metrics)
+    for col, ndigits in FLOAT_COLUMNS.items():
+        val = rounded.get(col)
+        if isinstance(val, float):
+            rounded[col] = round(val, ndigits)
+    return rounded
+
+
 def append_fitbit(metrics: dict):
-    """Append a row of Fitbit metrics to the 'Fitbit' tab."""
-    sheet = _get_sheet()
-    ws = sheet.worksheet("Fitbit")
-    row = [_timestamp()] + [metrics.get(col, "") for col in FITBIT_COLUMNS]
+    """Append a row of Fitbit metrics to the 'Fitbit' tab.
+
+    Returns the metrics as written (float columns rounded).
+    """
+    ws = _get_ws("Fitbit")
+    rounded = round_metrics(metrics)
+    row = [_timestamp(), *_GETTER({**_DEFAULTS, **rounded})]
     ws.append_row(row, value_input_option="USER_ENTERED")
     print(f"Fitbit data appended ({row[0]})")
+    return rounded
 
 
 def append_bp(readings: list[dict]):
@@ -42,8 +88,7 @@ def append_bp(readings: list[dict]):
 
     readings: list of dicts with keys: systolic, diastolic, pulse, notes
     """
-    sheet = _get_sheet()
-    ws = sheet.worksheet("Blood Pressure")
+    ws = _get_ws("Blood Pressure")
     ts = _timestamp()
     rows = []
     for i, r in enumerate(readings, 1):
@@ -55,8 +100,7 @@ def append_bp(readings: list[dict]):
             r.get("pulse", ""),
             r.get("notes", ""),
         ])
-    for row in rows:
-        ws.append_row(row, value_input_option="USER_ENTERED")
+    ws.append_rows(rows, value_input_option="USER_ENTERED")
     print(f"Blood pressure: {len(rows)} reading(s) appended ({ts})")
 
 
@@ -65,8 +109,7 @@ def append_diet(meal: str, items: list[dict]):
 
     items: list of dicts with keys: food_item, weight_grams, notes
     """
-    sheet = _get_sheet()
-    ws = sheet.worksheet("Diet")
+    ws = _get_ws("Diet")
     ts = _timestamp()
     rows = []
     for item in items:
@@ -77,6 +120,5 @@ def append_diet(meal: str, items: list[dict]):
             item.get("weight_grams", ""),
             item.get("notes", ""),
         ])
-    for row in rows:
-        ws.append_row(row, value_input_option="USER_ENTERED")
+    ws.append_rows(rows, value_input_option="USER_ENTERED")
     print(f"Diet: {len(rows)} item(s) appended for {meal} ({ts})")